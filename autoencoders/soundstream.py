@@ -7,6 +7,17 @@ from vector_quantize_pytorch import ResidualVQ
 def mod_sigmoid(x):
     return 2 * torch.sigmoid(x)**2.3 + 1e-7
 
+ACTIVATIONS = {
+    "elu": nn.ELU,
+    "silu": nn.SiLU,
+    "relu": nn.ReLU,
+}
+
+def get_activation(activation, inplace=False):
+    if activation not in ACTIVATIONS:
+        raise ValueError(f'Unknown activation "{activation}", expected one of {list(ACTIVATIONS)}')
+    return ACTIVATIONS[activation](inplace=inplace)
+
 # Generator
 class CausalConv1d(nn.Conv1d):
     def __init__(self, *args, **kwargs):
@@ -35,46 +46,60 @@ class CausalConvTranspose1d(nn.ConvTranspose1d):
 
 
 class ResidualUnit(nn.Module):
-    def __init__(self, in_channels, out_channels, dilation):
+    def __init__(self, in_channels, out_channels, dilation, activation="elu", separable=False):
         super().__init__()
         
         self.dilation = dilation
 
+        if separable:
+            # Depthwise dilated conv followed by a pointwise conv, MobileNet style
+            dilated_conv = [
+                CausalConv1d(in_channels=in_channels, out_channels=in_channels,
+                          kernel_size=7, dilation=dilation, groups=in_channels),
+                nn.Conv1d(in_channels=in_channels, out_channels=out_channels,
+                          kernel_size=1)
+            ]
+        else:
+            dilated_conv = [
+                CausalConv1d(in_channels=in_channels, out_channels=out_channels,
+                          kernel_size=7, dilation=dilation)
+            ]
+
         self.layers = nn.Sequential(
-            CausalConv1d(in_channels=in_channels, out_channels=out_channels,
-                      kernel_size=7, dilation=dilation),
-            nn.ELU(),
-            nn.Conv1d(in_channels=in_channels, out_channels=out_channels,
+            *dilated_conv,
+            get_activation(activation, inplace=True),
+            nn.Conv1d(in_channels=out_channels, out_channels=out_channels,
                       kernel_size=1)
         )
 
     def forward(self, x):
-        return x + self.layers(x)
+        # The branch output is a fresh tensor, so accumulate the skip into it rather than allocating another
+        return self.layers(x).add_(x)
 
 
 class EncoderBlock(nn.Module):
-    def __init__(self, in_channels, out_channels, stride):
+    def __init__(self, in_channels, out_channels, stride, activation="elu", separable=False):
         super().__init__()
 
         self.layers = nn.Sequential(
             ResidualUnit(in_channels=in_channels,
-                         out_channels=in_channels, dilation=1),
-            nn.ELU(),
+                         out_channels=in_channels, dilation=1, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=in_channels,
-                         out_channels=in_channels, dilation=3),
-            nn.ELU(),
+                         out_channels=in_channels, dilation=3, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=in_channels,
-                         out_channels=in_channels, dilation=9),
-            nn.ELU(),
+                         out_channels=in_channels, dilation=9, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=in_channels,
-                         out_channels=in_channels, dilation=1),
-            nn.ELU(),
+                         out_channels=in_channels, dilation=1, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=in_channels,
-                         out_channels=in_channels, dilation=3),
-            nn.ELU(),
+                         out_channels=in_channels, dilation=3, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=in_channels,
-                         out_channels=in_channels, dilation=9),
-            nn.ELU(),
+                         out_channels=in_channels, dilation=9, activation=activation, separable=separable),
+            get_activation(activation),
             CausalConv1d(in_channels=in_channels, out_channels=out_channels,
                       kernel_size=2*stride, stride=stride)
         )
@@ -84,31 +109,31 @@ class EncoderBlock(nn.Module):
 
 
 class DecoderBlock(nn.Module):
-    def __init__(self, in_channels, out_channels, stride):
+    def __init__(self, in_channels, out_channels, stride, activation="elu", separable=False):
         super().__init__()
 
         self.layers = nn.Sequential(
             CausalConvTranspose1d(in_channels=in_channels,
                                out_channels=out_channels,
                                kernel_size=2*stride, stride=stride),
-            nn.ELU(),
+            get_activation(activation),
             ResidualUnit(in_channels=out_channels, out_channels=out_channels,
-                         dilation=1),
-            nn.ELU(),
+                         dilation=1, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=out_channels, out_channels=out_channels,
-                         dilation=3),
-            nn.ELU(),
+                         dilation=3, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=out_channels, out_channels=out_channels,
-                         dilation=9),
-            nn.ELU(),
+                         dilation=9, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=out_channels, out_channels=out_channels,
-                         dilation=1),
-            nn.ELU(),
+                         dilation=1, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=out_channels, out_channels=out_channels,
-                         dilation=3),
-            nn.ELU(),
+                         dilation=3, activation=activation, separable=separable),
+            get_activation(activation),
             ResidualUnit(in_channels=out_channels, out_channels=out_channels,
-                         dilation=9),
+                         dilation=9, activation=activation, separable=separable),
         )
 
     def forward(self, x):
@@ -116,7 +141,7 @@ class DecoderBlock(nn.Module):
 
 
 class SoundStreamXLEncoder(nn.Module):
-    def __init__(self, in_channels=2, capacity=32, latent_dim=128, c_mults = [2, 4, 4, 4, 8, 16], strides = [2, 2, 2, 4, 5, 8]):
+    def __init__(self, in_channels=2, capacity=32, latent_dim=128, c_mults = [2, 4, 4, 4, 8, 16], strides = [2, 2, 2, 4, 5, 8], activation="elu", separable=False):
         super().__init__()
           
         c_mults = [1] + c_mults
@@ -125,12 +150,12 @@ class SoundStreamXLEncoder(nn.Module):
 
         layers = [
             CausalConv1d(in_channels=in_channels, out_channels=c_mults[0] * capacity, kernel_size=7),
-            nn.ELU()
+            get_activation(activation)
         ]
         
         for i in range(self.depth-1):
-            layers.append(EncoderBlock(in_channels=c_mults[i]*capacity, out_channels=c_mults[i+1]*capacity, stride=strides[i]))
-            layers.append(nn.ELU())
+            layers.append(EncoderBlock(in_channels=c_mults[i]*capacity, out_channels=c_mults[i+1]*capacity, stride=strides[i], activation=activation, separable=separable))
+            layers.append(get_activation(activation))
 
         layers.append(CausalConv1d(in_channels=c_mults[-1]*capacity, out_channels=latent_dim, kernel_size=3))
 
@@ -141,7 +166,7 @@ class SoundStreamXLEncoder(nn.Module):
 
 
 class SoundStreamXLDecoder(nn.Module):
-    def __init__(self, out_channels=2, capacity=32, latent_dim=128, c_mults = [2, 4, 4, 4, 8, 16], strides = [2, 2, 2, 4, 5, 8]):
+    def __init__(self, out_channels=2, capacity=32, latent_dim=128, c_mults = [2, 4, 4, 4, 8, 16], strides = [2, 2, 2, 4, 5, 8], activation="elu", separable=False):
         super().__init__()
 
         c_mults = [1] + c_mults
@@ -150,12 +175,12 @@ class SoundStreamXLDecoder(nn.Module):
 
         layers = [
             CausalConv1d(in_channels=latent_dim, out_channels=c_mults[-1]*capacity, kernel_size=7),
-            nn.ELU()
+            get_activation(activation)
         ]
         
         for i in range(self.depth-1, 0, -1):
-            layers.append(DecoderBlock(in_channels=c_mults[i]*capacity, out_channels=c_mults[i-1]*capacity, stride=strides[i-1]))
-            layers.append(nn.ELU())
+            layers.append(DecoderBlock(in_channels=c_mults[i]*capacity, out_channels=c_mults[i-1]*capacity, stride=strides[i-1], activation=activation, separable=separable))
+            layers.append(get_activation(activation))
 
         self.layers = nn.Sequential(*layers)
 
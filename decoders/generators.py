@@ -3,6 +3,7 @@
 import torch
 import torch.nn as nn
 import torch.nn.utils.weight_norm as wn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
 
 import cached_conv as cc
 
@@ -115,6 +116,16 @@ class RaveEncoder(nn.Module):
         self.net = cc.CachedSequential(*net)
         self.cumulative_delay = self.net.cumulative_delay
 
+    def fuse_bn(self):
+        """Folds every BatchNorm1d into the conv directly before it, leaving LeakyReLU -> Conv1d per stage.
+        Inference only, puts the encoder in eval mode."""
+        self.eval()
+        for i, layer in enumerate(list(self.net)):
+            if isinstance(layer, nn.BatchNorm1d):
+                self.net[i - 1] = fuse_conv_bn_eval(self.net[i - 1], layer)
+                self.net[i] = nn.Identity()
+        return self
+
     def forward(self, x):
         return self.net(x)
         
@@ -57,11 +57,17 @@ class StackDiscriminators(nn.Module):
         self.discriminators = nn.ModuleList(
             [Discriminator(*args, **kwargs) for i in range(n_dis)], )
 
+    def downsample(self, x):
+        # Each scale halves the previous one, skipping the unused pool after the last scale
+        scales = [x]
+        for _ in range(1, len(self.discriminators)):
+            scales.append(nn.functional.avg_pool1d(scales[-1], 2))
+        return scales
+
     def forward(self, x):
         features = []
-        for layer in self.discriminators:
-            features.append(layer(x))
-            x = nn.functional.avg_pool1d(x, 2)
+        for layer, x_scale in zip(self.discriminators, self.downsample(x)):
+            features.append(layer(x_scale))
         return features
 
     def adversarial_combine(self, score_real, score_fake):
@@ -172,20 +178,21 @@ class STFTDiscriminator(nn.Module):
             nn.Conv2d(in_channels=16*capacity, out_channels=1,
                       kernel_size=(F_bins//2**6, 1))
         ])
+
+        self.register_buffer("length_offsets", torch.tensor([-6, -6, -5, -5, -3, -3, 1, 1]), persistent=False)
+        self.register_buffer("length_divisors", torch.tensor([1, 1, 2, 2, 4, 4, 8, 8]), persistent=False)
+
+        # cuDNN's Tensor Core conv kernels (especially in fp16) prefer NHWC
+        self.to(memory_format=torch.channels_last)
     
     def features_lengths(self, lengths):
-        return [
-            lengths-6,
-            lengths-6,
-            torch.div(lengths-5, 2, rounding_mode="floor"),
-            torch.div(lengths-5, 2, rounding_mode="floor"),
-            torch.div(lengths-3, 4, rounding_mode="floor"),
-            torch.div(lengths-3, 4, rounding_mode="floor"),
-            torch.div(lengths+1, 8, rounding_mode="floor"),
-            torch.div(lengths+1, 8, rounding_mode="floor")
-        ]
+        # floor((lengths + offset) / divisor) for every feature map in one op
+        offsets = self.length_offsets.to(lengths.device)
+        divisors = self.length_divisors.to(lengths.device)
+        return list(torch.div(lengths[..., None] + offsets, divisors, rounding_mode="floor").unbind(-1))
 
     def forward(self, x):
+        x = x.contiguous(memory_format=torch.channels_last)
         feature_map = []
         for layer in self.layers:
             x = layer(x)
@@ -0,0 +1,27 @@
+import torch
+import torch.nn.functional as F
+
+from losses.adv_losses import StackDiscriminators
+
+import unittest
+
+class TestStackDiscriminators(unittest.TestCase):
+
+    def test_downsample_matches_repeated_avg_pool(self):
+        discriminator = StackDiscriminators(4, in_size=2, capacity=4, multiplier=4, n_layers=2)
+
+        #Odd lengths check the floor behaviour at every halving
+        for length in [4096, 4097, 4099, 1001]:
+            signal = torch.randn([3, 2, length])
+            scales = discriminator.downsample(signal)
+
+            expected = signal
+            self.assertEqual(len(scales), 4)
+            for scale in scales:
+                self.assertEqual(list(expected.shape), list(scale.shape))
+                self.assertTrue(torch.allclose(expected, scale, atol=1e-6))
+                expected = F.avg_pool1d(expected, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import torch
+from torch import nn
+from copy import deepcopy
+
+from decoders.generators import RaveEncoder
+
+import unittest
+
+class TestRaveEncoder(unittest.TestCase):
+
+    def test_fuse_bn_matches_eval(self):
+        encoder = RaveEncoder(data_size=2, capacity=8, latent_size=16, ratios=[2, 4])
+
+        #Give the batch norms non-trivial statistics and affine parameters
+        for layer in encoder.modules():
+            if isinstance(layer, nn.BatchNorm1d):
+                layer.running_mean.uniform_(-1, 1)
+                layer.running_var.uniform_(0.5, 2)
+                layer.weight.data.uniform_(0.5, 2)
+                layer.bias.data.uniform_(-1, 1)
+
+        encoder.eval()
+        fused = deepcopy(encoder).fuse_bn()
+
+        signal = torch.randn([2, 2, 2048])
+        with torch.no_grad():
+            expected = encoder(signal)
+            output = fused(signal)
+
+        self.assertFalse(any(isinstance(layer, nn.BatchNorm1d) for layer in fused.modules()))
+        self.assertEqual(list(expected.shape), list(output.shape))
+        self.assertTrue(torch.allclose(expected, output, atol=1e-4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import torch
+import torch.nn.functional as F
+
+from autoencoders.soundstream import ACTIVATIONS, CausalConv1d, ResidualUnit, SoundStreamXLEncoder, SoundStreamXLDecoder
+
+import unittest
+
+class TestCausalConv1d(unittest.TestCase):
+
+    def assert_matches_left_padding(self, conv, length):
+        signal = torch.randn([2, conv.in_channels, length])
+        output = conv(signal)
+
+        #The reference is the explicit left-padded causal conv
+        expected = F.conv1d(F.pad(signal, [conv.causal_padding, 0]), conv.weight, conv.bias,
+                            conv.stride, 0, conv.dilation, conv.groups)
+
+        self.assertEqual(list(expected.shape), list(output.shape))
+        self.assertTrue(torch.allclose(expected, output, atol=1e-5))
+        self.assertTrue(output.is_contiguous())
+
+    def test_stride_one(self):
+        self.assert_matches_left_padding(CausalConv1d(4, 8, kernel_size=7), 1001)
+
+    def test_strided(self):
+        for stride in [2, 4, 5, 8]:
+            for length in [640, 641, 643]:
+                self.assert_matches_left_padding(CausalConv1d(4, 8, kernel_size=2*stride, stride=stride), length)
+
+    def test_dilated(self):
+        for dilation in [3, 9]:
+            self.assert_matches_left_padding(CausalConv1d(4, 4, kernel_size=7, dilation=dilation), 1000)
+
+    def test_depthwise(self):
+        self.assert_matches_left_padding(CausalConv1d(4, 4, kernel_size=7, dilation=3, groups=4), 1000)
+
+    def test_pointwise(self):
+        self.assert_matches_left_padding(CausalConv1d(4, 1, kernel_size=1), 1000)
+
+
+class TestResidualUnit(unittest.TestCase):
+
+    def test_matches_reference_with_backward(self):
+        unit = ResidualUnit(4, 4, dilation=3)
+        unit.train()
+        causal_conv, _, pointwise = unit.layers
+
+        signal = torch.randn([2, 4, 500], requires_grad=True)
+        signal_before = signal.detach().clone()
+
+        output = unit(signal)
+        output.pow(2).sum().backward()
+
+        #The skip connection must not write into the input
+        self.assertTrue(torch.equal(signal_before, signal.detach()))
+
+        #Reference: x + conv1x1(act(causal_conv(x))) without any in-place ops
+        signal_ref = signal.detach().clone().requires_grad_()
+        params_ref = [p.detach().clone().requires_grad_() for p in
+                      [causal_conv.weight, causal_conv.bias, pointwise.weight, pointwise.bias]]
+        hidden = F.conv1d(F.pad(signal_ref, [causal_conv.causal_padding, 0]), params_ref[0], params_ref[1], dilation=3)
+        expected = signal_ref + F.conv1d(F.elu(hidden), params_ref[2], params_ref[3])
+        expected.pow(2).sum().backward()
+
+        self.assertTrue(torch.allclose(expected, output, atol=1e-5))
+        self.assertTrue(torch.allclose(signal_ref.grad, signal.grad, atol=1e-4))
+        grads = [causal_conv.weight.grad, causal_conv.bias.grad, pointwise.weight.grad, pointwise.bias.grad]
+        for param_ref, grad in zip(params_ref, grads):
+            self.assertTrue(torch.allclose(param_ref.grad, grad, atol=1e-3))
+
+
+class TestSoundStreamXL(unittest.TestCase):
+
+    def test_activations_and_separable(self):
+        for activation in ACTIVATIONS:
+            for separable in [False, True]:
+                encoder = SoundStreamXLEncoder(in_channels=2, capacity=4, latent_dim=8, c_mults=[2, 4], strides=[2, 2],
+                                               activation=activation, separable=separable)
+                decoder = SoundStreamXLDecoder(out_channels=2, capacity=4, latent_dim=8, c_mults=[2, 4], strides=[2, 2],
+                                               activation=activation, separable=separable)
+
+                signal = torch.randn([2, 2, 256])
+                latents = encoder(signal)
+                decoded = decoder(latents)
+
+                self.assertEqual([2, 8, 64], list(latents.shape))
+                self.assertEqual([2, 2, 256], list(decoded.shape))
+
+                decoded.pow(2).mean().backward()
+                for param in [*encoder.parameters(), *decoder.parameters()]:
+                    self.assertIsNotNone(param.grad)
+
+                units = [m for m in [*encoder.modules(), *decoder.modules()] if isinstance(m, ResidualUnit)]
+                self.assertTrue(len(units) > 0)
+                for unit in units:
+                    dilated_conv = unit.layers[0]
+                    expected_groups = dilated_conv.in_channels if separable else 1
+                    self.assertEqual(expected_groups, dilated_conv.groups)
+                    self.assertIsInstance(unit.layers[-2], ACTIVATIONS[activation])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
 from random import randint
@@ -47,35 +48,50 @@ class DemoCallback(pl.Callback):
         super().__init__()
         self.pqmf = PQMF(2, 70, global_args.pqmf_bands)
         self.demo_dir = global_args.demo_dir
-        self.demo_samples = global_args.sample_size
         self.demo_every = global_args.demo_every
         self.demo_steps = global_args.demo_steps
         self.ms_encoder = MidSideEncoding()
         self.pad_crop = PadCrop(global_args.sample_size)
+        self.demo_batch = None
 
     @rank_zero_only
-    @torch.no_grad()
-    def on_train_batch_end(self, trainer, module, outputs, batch, batch_idx, unused=0):
-        last_demo_step = -1
-        if (trainer.global_step - 1) % self.demo_every != 0 or last_demo_step == trainer.global_step:
+    def on_fit_start(self, trainer, module):
+        # Only rank zero makes demos, and by now the process is bound to its own GPU, so pinning
+        # here doesn't open a CUDA context on GPU 0 from every rank.
+        # The demo files don't change during a run, so load them once instead of on every demo
+        demo_audio = []
+        for demo_file in glob(f'{self.demo_dir}/**/*.wav', recursive=True):
+            audio, sr = torchaudio.load(demo_file)
+            audio = audio.clamp(-1, 1)
+            audio = self.pad_crop(audio)
+            audio = self.ms_encoder(audio)
+            demo_audio.append(audio)
+
+        if not demo_audio:
+            print(f'No .wav files found in {self.demo_dir}, skipping demos', file=sys.stderr)
             return
 
-        last_demo_step = trainer.global_step
+        # The PQMF analysis of a constant batch is constant too
+        with torch.no_grad():
+            self.demo_batch = self.pqmf(torch.stack(demo_audio))
 
-        demo_files = glob(f'{self.demo_dir}/**/*.wav', recursive=True)
+        # Pinned so the per-demo copy to the GPU is actually asynchronous
+        if torch.cuda.is_available():
+            self.demo_batch = self.demo_batch.pin_memory()
 
-        audio_batch = torch.zeros(len(demo_files), 2, self.demo_samples)
+    @rank_zero_only
+    @torch.inference_mode()
+    def on_train_batch_end(self, trainer, module, outputs, batch, batch_idx, unused=0):
+        if self.demo_batch is None:
+            return
 
-        for i, demo_file in enumerate(demo_files):
-            audio, sr = torchaudio.load(demo_file)
-            audio = audio.clamp(-1, 1)
-            audio = self.pad_crop(audio)
-            audio = self.ms_encoder(audio)
-            audio_batch[i] = audio
+        last_demo_step = -1
+        if (trainer.global_step - 1) % self.demo_every != 0 or last_demo_step == trainer.global_step:
+            return
 
-        audio_batch = self.pqmf(audio_batch)
+        last_demo_step = trainer.global_step
 
-        audio_batch = audio_batch.to(module.device)
+        audio_batch = self.demo_batch.to(module.device, non_blocking=True)
 
         with eval_mode(module):
             fakes = sample(module, audio_batch, self.demo_steps, 1)
@@ -84,11 +100,17 @@ class DemoCallback(pl.Callback):
         fakes = self.pqmf.inverse(fakes.cpu())
         try:
             log_dict = {}
-            for i, fake in enumerate(fakes):
+            # Mid-side encode and convert the whole batch at once, the transposed view puts channels first for the encoder
+            fakes = self.ms_encoder(fakes.transpose(0, 1)).transpose(0, 1)
+            fakes = fakes.clamp(-1, 1).mul(32767).to(torch.int16)
+
+            filenames = [f'demo_{trainer.global_step:08}_{i:02}.wav' for i in range(len(fakes))]
+
+            # torchaudio.save releases the GIL while writing, so the files can be written concurrently
+            with ThreadPoolExecutor() as executor:
+                list(executor.map(lambda filename, fake: torchaudio.save(filename, fake, 44100), filenames, fakes))
 
-                filename = f'demo_{trainer.global_step:08}_{i:02}.wav'
-                fake = self.ms_encoder(fake).clamp(-1, 1).mul(32767).to(torch.int16).cpu()
-                torchaudio.save(filename, fake, 44100)
+            for i, filename in enumerate(filenames):
                 log_dict[f'demo_{i}'] = wandb.Audio(filename,
                                                     sample_rate=44100,
                                                     caption=f'Demo {i}')
@@ -152,26 +152,26 @@ class DiffusionDVAE(pl.LightningModule):
         noised_reals = reals * alphas + noise * sigmas
         targets = noise * alphas - reals * sigmas
 
-        # Compute the model output and the loss.
-        with torch.cuda.amp.autocast():
-            tokens = self.encoder(encoder_input).float()
+        # Compute the model output and the loss. The Trainer's precision setting already autocasts
+        # the whole step, in bf16 or fp16 to match its loss scaling
+        tokens = self.encoder(encoder_input).float()
 
         if self.num_quantizers > 0:
             #Rearrange for Memcodes
             tokens = rearrange(tokens, 'b d n -> b n d')
 
-            #Quantize into memcodes
-            tokens, _ = self.quantizer(tokens)
+            #Quantize into memcodes, in fp32 so codebook distances give stable assignments
+            with torch.cuda.amp.autocast(enabled=False):
+                tokens, _ = self.quantizer(tokens)
 
             tokens = rearrange(tokens, 'b n d -> b d n')
 
         # p = torch.rand([reals.shape[0], 1], device=reals.device)
         # tokens = torch.where(p > 0.2, tokens, torch.zeros_like(tokens))
 
-        with torch.cuda.amp.autocast():
-            v = self.diffusion(noised_reals, t, tokens)
-            mse_loss = F.mse_loss(v, targets)
-            loss = mse_loss
+        v = self.diffusion(noised_reals, t, tokens)
+        mse_loss = F.mse_loss(v, targets)
+        loss = mse_loss
 
         log_dict = {
             'train/loss': loss.detach(),
@@ -292,8 +292,10 @@ def main():
     torch.manual_seed(args.seed)
 
     train_set = SampleDataset([args.training_dir], args)
+    # pin_memory already pins for the current CUDA device, and Lightning copies batches with
+    # non_blocking=True, so neither pin_memory_device nor a transfer_batch_to_device override is needed
     train_dl = data.DataLoader(train_set, args.batch_size, shuffle=True,
-                               num_workers=args.num_workers, persistent_workers=True, pin_memory=True)
+                               num_workers=args.num_workers, persistent_workers=True, pin_memory=True, prefetch_factor=4)
     wandb_logger = pl.loggers.WandbLogger(project=args.name)
     demo_dl = data.DataLoader(train_set, args.num_demos, num_workers=args.num_workers, shuffle=True)
     
@@ -310,7 +312,7 @@ def main():
         #devices= args.num_gpus,
         #num_nodes = args.num_nodes,
         strategy='ddp',
-        precision=16,
+        precision='bf16' if torch.cuda.is_bf16_supported() else 16,
         accumulate_grad_batches=args.accum_batches, 
         callbacks=[ckpt_callback, demo_callback, exc_callback],
         logger=wandb_logger,
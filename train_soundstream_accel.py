@@ -93,7 +93,9 @@ class SoundStream(nn.Module):
             capacity=capacity, 
             latent_dim=global_args.latent_dim,
             c_mults = c_mults,
-            strides = strides
+            strides = strides,
+            activation = global_args.activation,
+            separable = global_args.separable
         )
 
         self.decoder = SoundStreamXLDecoder(
@@ -101,7 +103,9 @@ class SoundStream(nn.Module):
             capacity=capacity, 
             latent_dim=global_args.latent_dim,
             c_mults = c_mults,
-            strides = strides
+            strides = strides,
+            activation = global_args.activation,
+            separable = global_args.separable
         )
 
         self.discriminator = StackDiscriminators(
@@ -160,6 +164,30 @@ class SoundStream(nn.Module):
 
         self.warmed_up = False
 
+        self.cuda_graphs = False
+
+    def graph_modules(self, batch_size, sample_size):
+        """Captures the encoder and decoder forward and backward passes into CUDA graphs to cut
+        per-kernel launch overhead. Input shapes must stay fixed after this is called."""
+        self.cuda_graphs = True
+
+        reals = torch.zeros([batch_size, 2, sample_size], device=self.device)
+
+        with torch.no_grad():
+            encoder_input = self.pqmf(reals) if self.pqmf_bands > 1 else reals
+            latents = torch.zeros_like(self.encoder(encoder_input), requires_grad=True)
+
+        # The decoder graph is captured for inputs that require grad, which stops being true once the
+        # encoder is frozen after warmup, so keep the eager forward around for that phase
+        self.decoder_eager = self.decoder.forward
+
+        # Graphed callables need the autocast weight cache disabled, see loss()
+        with torch.cuda.amp.autocast(cache_enabled=False):
+            self.encoder, self.decoder = torch.cuda.make_graphed_callables(
+                (self.encoder, self.decoder),
+                ((encoder_input,), (latents,))
+            )
+
     def loss(self, reals):
 
         p = Profiler()
@@ -171,7 +199,7 @@ class SoundStream(nn.Module):
             p.tick("pqmf")
 
         # Compute the model output and the loss.
-        with torch.cuda.amp.autocast():
+        with torch.cuda.amp.autocast(cache_enabled=not self.cuda_graphs):
 
             if self.warmed_up:
                 with torch.no_grad():
@@ -195,7 +223,10 @@ class SoundStream(nn.Module):
 
             #p.tick("quantizer")
 
-            decoded = self.decoder(tokens)
+            if self.cuda_graphs and self.warmed_up:
+                decoded = self.decoder_eager(tokens)
+            else:
+                decoded = self.decoder(tokens)
 
             #p.tick("decoder")
 
@@ -268,6 +299,24 @@ def main():
 
     model = SoundStream(args, device)
 
+    if args.compile and args.cuda_graphs:
+        # reduce-overhead compilation already captures CUDA graphs
+        raise ValueError('compile and cuda_graphs can not both be enabled')
+
+    if args.compile:
+        # In-place Module.compile keeps the state_dict keys unchanged, unlike wrapping with torch.compile
+        if not hasattr(nn.Module, 'compile'):
+            raise RuntimeError(f'compile = True needs torch >= 2.2 (nn.Module.compile), found torch {torch.__version__}')
+        # Shapes are fixed by sample_size and batch_size, this just leaves headroom for PQMF band changes
+        torch._dynamo.config.cache_size_limit = 64
+        # The quantizer stays eager, its codebook updates cause graph breaks
+        model.encoder.compile(mode=args.compile_mode)
+        model.decoder.compile(mode=args.compile_mode)
+
+    if args.cuda_graphs:
+        model.to(device)
+        model.graph_modules(args.batch_size, args.sample_size)
+
     accelerator.print('Parameters:', utils.n_params(model))
 
     # If logging to wandb, initialize the run
@@ -285,7 +334,7 @@ def main():
 
     train_set = SampleDataset([args.training_dir], args)
     train_dl = data.DataLoader(train_set, args.batch_size, shuffle=True,
-                               num_workers=args.num_workers, persistent_workers=True, pin_memory=True)
+                               num_workers=args.num_workers, persistent_workers=True, pin_memory=True, drop_last=args.cuda_graphs)
 
     model, opt_gen, opt_disc, train_dl = accelerator.prepare(model, opt_gen, opt_disc, train_dl)
 